@@ -9,25 +9,70 @@ A Qt5 system tray application to manage Lenovo laptop settings:
 
 import sys
 import os
-import subprocess
-from enum import Enum
+import errno
+import shlex
+import struct
+import asyncio
+import qasync
 from PyQt5.QtWidgets import (QApplication, QSystemTrayIcon, QMenu, QAction, 
                             QMessageBox, QWidget)
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QIcon, QPixmap, QPainter, QPen, QBrush, QFont
+from PyQt5.QtCore import QSocketNotifier, QTimer
+from PyQt5.QtGui import QIcon
 
 
-class SettingStatus(Enum):
-    """Enum for different setting statuses"""
-    CONSERVATION_DISABLED = 0
-    CONSERVATION_ENABLED = 1
+# Bundled icons, next to the script when run from a checkout or installed
+ICON_DIRS = (
+    os.path.dirname(os.path.abspath(__file__)),
+    "/usr/share/vantageslim5/icons",
+)
+
+# Fallback status refresh, ideapad-laptop does not notify changes made by
+# the firmware (Fn+Esc, charge controller) on conservation_mode and fn_lock
+STATUS_POLL_INTERVAL = 5000  # ms
+
+# Keyboard LED brightness levels, indexed by the system file value
+KBD_LED_LEVELS = ("Off", "Min", "Max")
+
+
+class HelperClient:
+    """Connection to the privileged helper (lenovo-tray-helper.socket)"""
     
-    FNLOCK_DISABLED = 0
-    FNLOCK_ENABLED = 1
+    SOCKET_PATH = "/run/lenovo-tray-helper.sock"
     
-    KBD_LED_OFF = 0
-    KBD_LED_MIN = 1
-    KBD_LED_MAX = 2
+    def __init__(self):
+        self._reader = None
+        self._writer = None
+        # Batches are written from separate tasks, keep requests and ACKs paired
+        self._lock = asyncio.Lock()
+    
+    async def write(self, writes):
+        """Ask the helper to apply a list of (setting_id, value) writes.
+        
+        Returns one bool per write, or None if the helper is unavailable.
+        """
+        request = b"".join(struct.pack('BB', setting_id, int(value)) for setting_id, value in writes)
+        async with self._lock:
+            # Retry once in case the helper was restarted since the last write
+            for _ in range(2):
+                try:
+                    if self._writer is None:
+                        self._reader, self._writer = await asyncio.wait_for(
+                            asyncio.open_unix_connection(self.SOCKET_PATH), 5)
+                    self._writer.write(request)
+                    await self._writer.drain()
+                    acks = await asyncio.wait_for(self._reader.readexactly(len(writes)), 5)
+                    return [ack == 1 for ack in acks]
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    pass
+                self.close()
+            return None
+    
+    def close(self):
+        """Close the connection to the helper"""
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = None
+            self._writer = None
 
 
 class LenovoTrayApp(QWidget):
@@ -42,19 +87,57 @@ class LenovoTrayApp(QWidget):
         self.conservation_file = os.path.join(self.base_folder, "conservation_mode")
         self.fnlock_file = os.path.join(self.base_folder, "fn_lock")
         self.kbd_led_file = os.path.join(self.base_folder, "leds/platform::kbd_backlight/brightness")
+        # The LED core notifies Fn+Space changes here rather than on brightness
+        self.kbd_led_hw_file = os.path.join(self.base_folder, "leds/platform::kbd_backlight/brightness_hw_changed")
+        
+        self._status_files = (self.conservation_file, self.fnlock_file, self.kbd_led_file)
+        
+        # Writes go through the privileged helper, which uses these setting ids
+        self.helper = HelperClient()
+        self._setting_ids = {filepath: setting_id for setting_id, filepath in enumerate(self._status_files)}
+        
+        # Writes made in quick succession are sent together (one pkexec prompt)
+        self._pending_writes = {}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(150)
+        self._flush_timer.timeout.connect(self._flush_writes)
+        self._write_tasks = set()
+        # Number of batches being written, by system file path
+        self._writes_in_flight = {}
+        
+        # Keep the system files open so polling only needs a seek and a read
+        self._fds = {}
+        for filepath in self._status_files:
+            try:
+                self._fds[filepath] = os.open(filepath, os.O_RDONLY)
+            except (FileNotFoundError, PermissionError) as e:
+                print(f"Error opening {filepath}: {e}")
+        
+        # Only present when the driver reports hardware brightness changes
+        try:
+            self._fds[self.kbd_led_hw_file] = os.open(self.kbd_led_hw_file, os.O_RDONLY)
+        except OSError:
+            pass
         
         # Current status cache
-        self.conservation_status = SettingStatus.CONSERVATION_DISABLED
-        self.fnlock_status = SettingStatus.FNLOCK_DISABLED
-        self.kbd_led_status = SettingStatus.KBD_LED_OFF
+        self.conservation_on = False
+        self.fnlock_on = False
+        self.kbd_led_level = 0
         
-        self.init_ui()
-        self.read_initial_status()
+        # Change notifiers by system file path
+        self._notifiers = {}
         
-        # Timer to periodically update status
-        self.status_timer = QTimer()
+        # Slow refresh for changes made without notification
+        self.status_timer = QTimer(self)
+        self.status_timer.setInterval(STATUS_POLL_INTERVAL)
         self.status_timer.timeout.connect(self.update_status)
-        self.status_timer.start(5000)  # Update every 5 seconds
+        
+        # Tooltip texts by (conservation_on, fnlock_on, kbd_led_level)
+        self._tooltip_cache = {}
+        self._last_tooltip = None
+        
+        self.init_ui()
     
     def init_ui(self):
         """Initialize the system tray UI"""
@@ -63,190 +146,68 @@ class LenovoTrayApp(QWidget):
         # Create system tray icon
         self.tray_icon = QSystemTrayIcon(self)
         
-        # Create a simple icon (you can replace with a custom icon file)
-        icon = self.create_icon()
-        self.tray_icon.setIcon(icon)
+        # QIcon only rasterizes the SVGs when they are first painted
+        self.tray_icon.setIcon(self._load_icon("vantage_icon", "battery"))
         
         # Create context menu
         self.create_context_menu()
         
+        # Load every icon variant once, status updates only swap them
+        self._icon_cons = {
+            False: self._load_icon("cons_off", "battery-good"),
+            True: self._load_icon("cons_on", "battery-good-charging"),
+        }
+        self._icon_fnlock = {
+            False: self._load_icon("fnlock_off", "input-keyboard"),
+            True: self._load_icon("fnlock_on", "input-keyboard"),
+        }
+        self._icon_kbd_led = {level: self._load_icon(f"kbd_{level}", "keyboard-brightness") for level in (0, 1, 2)}
+        self.refresh_action.setIcon(self._load_icon("refresh", "view-refresh"))
+        self.exit_action.setIcon(self._load_icon("exit", "application-exit"))
+        
         # Set the context menu
         self.tray_icon.setContextMenu(self.context_menu)
         
         # Show the tray icon
         self.tray_icon.show()
         
-        # Set tooltip
+        # This does not change during a session, avoid querying it per message
+        self._supports_msgs = self.tray_icon.supportsMessages()
+    
+    def _finish_init(self):
+        """Read the status and start watching the files.
+        
+        Called from the event loop so the tray icon shows up before any
+        file I/O happens.
+        """
+        self.read_initial_status()
+        
+        # Populate the menu even if the files match the default status
+        self.update_menu_text()
         self.update_tooltip()
+        
+        # Watch the system files for changes. sysfs attributes signal
+        # POLLPRI (an exception event for Qt) when the driver notifies a new
+        # value; they are always readable, so a Read notifier would fire
+        # continuously.
+        for filepath, fd in self._fds.items():
+            notifier = QSocketNotifier(fd, QSocketNotifier.Exception, self)
+            if filepath == self.kbd_led_hw_file:
+                notifier.activated.connect(self.on_kbd_led_hw_changed)
+            else:
+                notifier.activated.connect(self.update_status)
+            self._notifiers[filepath] = notifier
+        
+        # Not every file is notified, so keep refreshing slowly as well
+        self.status_timer.start()
     
-    def create_icon(self):
-        """Create a Vantage-style icon for the tray"""
-        # Try to load SVG icon first
-        icon_path = os.path.join(os.path.dirname(__file__), "vantage_icon.svg")
-        if os.path.exists(icon_path):
-            return QIcon(icon_path)
-        
-        # Fallback: Create programmatic icon
-        # Create a 32x32 pixmap for better quality
-        pixmap = QPixmap(32, 32)
-        pixmap.fill(Qt.transparent)
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Vantage-style colors (red/orange gradient)
-        gradient_color1 = Qt.red
-        gradient_color2 = Qt.darkRed
-        
-        # Draw the main circular background
-        painter.setBrush(QBrush(gradient_color1))
-        painter.setPen(QPen(gradient_color2, 2))
-        painter.drawEllipse(2, 2, 28, 28)
-        
-        # Draw the "V" letter in the center
-        painter.setPen(QPen(Qt.white, 3, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
-        
-        # V shape coordinates
-        # Left line of V
-        painter.drawLine(10, 8, 16, 22)
-        # Right line of V
-        painter.drawLine(16, 22, 22, 8)
-        
-        # Add a small highlight for 3D effect
-        painter.setPen(QPen(Qt.lightGray, 1))
-        painter.drawArc(4, 4, 24, 24, 45 * 16, 90 * 16)  # Top-left arc highlight
-        
-        painter.end()
-        
-        return QIcon(pixmap)
-    
-    def create_conservation_icon(self, enabled=False):
-        """Create an icon for conservation mode"""
-        pixmap = QPixmap(16, 16)
-        pixmap.fill(Qt.transparent)
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Battery outline
-        painter.setPen(QPen(Qt.darkGray, 1))
-        painter.drawRect(2, 4, 10, 8)
-        painter.drawRect(12, 6, 2, 4)  # Battery tip
-        
-        # Fill based on status
-        if enabled:
-            # Green fill for conservation mode enabled
-            painter.setBrush(QBrush(Qt.green))
-            painter.setPen(Qt.NoPen)
-            painter.drawRect(3, 5, 9, 6)
-            # Add "eco" symbol
-            painter.setPen(QPen(Qt.darkGreen, 1))
-            painter.drawText(4, 10, "E")
-        else:
-            # Normal battery fill
-            painter.setBrush(QBrush(Qt.gray))
-            painter.setPen(Qt.NoPen)
-            painter.drawRect(3, 5, 9, 6)
-        
-        painter.end()
-        return QIcon(pixmap)
-    
-    def create_fnlock_icon(self, enabled=False):
-        """Create an icon for FnLock"""
-        pixmap = QPixmap(16, 16)
-        pixmap.fill(Qt.transparent)
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Key outline
-        painter.setPen(QPen(Qt.darkGray, 1))
-        painter.setBrush(QBrush(Qt.lightGray if not enabled else Qt.yellow))
-        painter.drawRoundedRect(2, 6, 12, 8, 2, 2)
-        
-        # Fn text
-        painter.setPen(QPen(Qt.black, 1))
-        painter.setFont(QFont("Arial", 6, QFont.Bold))
-        painter.drawText(4, 12, "Fn")
-        
-        # Lock indicator
-        if enabled:
-            painter.setPen(QPen(Qt.red, 2))
-            painter.drawEllipse(10, 2, 4, 4)
-            painter.drawLine(12, 6, 12, 4)
-        
-        painter.end()
-        return QIcon(pixmap)
-    
-    def create_keyboard_led_icon(self, level=0):
-        """Create an icon for keyboard LED status"""
-        pixmap = QPixmap(16, 16)
-        pixmap.fill(Qt.transparent)
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Keyboard outline
-        painter.setPen(QPen(Qt.darkGray, 1))
-        painter.setBrush(QBrush(Qt.lightGray))
-        painter.drawRoundedRect(1, 8, 14, 6, 1, 1)
-        
-        # Keys
-        for i in range(3):
-            painter.drawRect(2 + i * 4, 9, 3, 2)
-            painter.drawRect(2 + i * 4, 11, 3, 2)
-        
-        # LED indicators based on level
-        if level == 0:  # Off
-            pass  # No additional drawing
-        elif level == 1:  # Min
-            painter.setBrush(QBrush(Qt.yellow))
-            painter.setPen(Qt.NoPen)
-            painter.drawEllipse(6, 2, 4, 4)
-        else:  # Max
-            painter.setBrush(QBrush(Qt.yellow))
-            painter.setPen(Qt.NoPen)
-            painter.drawEllipse(4, 1, 3, 3)
-            painter.drawEllipse(6, 2, 4, 4)
-            painter.drawEllipse(9, 1, 3, 3)
-        
-        painter.end()
-        return QIcon(pixmap)
-    
-    def create_refresh_icon(self):
-        """Create a refresh icon"""
-        pixmap = QPixmap(16, 16)
-        pixmap.fill(Qt.transparent)
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Circular arrow
-        painter.setPen(QPen(Qt.blue, 2))
-        painter.drawArc(2, 2, 12, 12, 30 * 16, 300 * 16)
-        
-        # Arrow head
-        painter.drawLine(12, 3, 14, 2)
-        painter.drawLine(12, 3, 13, 5)
-        
-        painter.end()
-        return QIcon(pixmap)
-    
-    def create_exit_icon(self):
-        """Create an exit icon"""
-        pixmap = QPixmap(16, 16)
-        pixmap.fill(Qt.transparent)
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # X mark
-        painter.setPen(QPen(Qt.red, 2, Qt.SolidLine, Qt.RoundCap))
-        painter.drawLine(4, 4, 12, 12)
-        painter.drawLine(4, 12, 12, 4)
-        
-        painter.end()
-        return QIcon(pixmap)
+    def _load_icon(self, name, theme_name):
+        """Load a bundled SVG icon, falling back to the desktop icon theme"""
+        for icon_dir in ICON_DIRS:
+            icon_path = os.path.join(icon_dir, name + ".svg")
+            if os.path.exists(icon_path):
+                return QIcon(icon_path)
+        return QIcon.fromTheme(theme_name)
 
     def create_context_menu(self):
         """Create the context menu for the tray icon"""
@@ -271,213 +232,304 @@ class LenovoTrayApp(QWidget):
         self.context_menu.addSeparator()
         
         # Refresh action
-        refresh_action = QAction("Refresh Status", self)
-        refresh_action.setIcon(self.create_refresh_icon())
-        refresh_action.triggered.connect(self.update_status)
-        self.context_menu.addAction(refresh_action)
+        self.refresh_action = QAction("Refresh Status", self)
+        self.refresh_action.triggered.connect(self.update_status)
+        self.context_menu.addAction(self.refresh_action)
         
         # Separator
         self.context_menu.addSeparator()
         
         # Exit action
-        exit_action = QAction("Exit", self)
-        exit_action.setIcon(self.create_exit_icon())
-        exit_action.triggered.connect(self.exit_application)
-        self.context_menu.addAction(exit_action)
+        self.exit_action = QAction("Exit", self)
+        self.exit_action.triggered.connect(self.exit_application)
+        self.context_menu.addAction(self.exit_action)
     
     def read_file_value(self, filepath):
-        """Read value from system file"""
+        """Read the raw bytes of a system file without a cached descriptor"""
         try:
-            with open(filepath, 'r') as f:
-                return f.read().strip()
+            with open(filepath, 'rb') as f:
+                return f.read(4)
         except (FileNotFoundError, PermissionError) as e:
             print(f"Error reading {filepath}: {e}")
             return None
     
     def write_file_value(self, filepath, value):
-        """Write value to system file using pkexec for GUI authentication"""
+        """Queue a write to a system file, flushed by _flush_writes"""
+        self._pending_writes[filepath] = value
+        self._flush_timer.start()
+    
+    def _flush_writes(self):
+        """Start writing all queued values, reporting to on_write_finished"""
+        if not self._pending_writes:
+            return
+        for filepath in self._pending_writes:
+            self._writes_in_flight[filepath] = self._writes_in_flight.get(filepath, 0) + 1
+        task = asyncio.ensure_future(self._write_batch(self._pending_writes))
+        self._pending_writes = {}
+        self._write_tasks.add(task)
+        task.add_done_callback(self._write_tasks.discard)
+    
+    async def _write_batch(self, writes):
+        """Write the values through the helper, falling back to pkexec"""
+        items = list(writes.items())
         try:
-            # Use pkexec with tee to write the value
+            results = await self.helper.write([(self._setting_ids[filepath], value) for filepath, value in items])
+            if results is None:
+                results = [await self._write_with_pkexec(items)] * len(items)
+        finally:
+            for filepath in writes:
+                self._writes_in_flight[filepath] -= 1
+                if not self._writes_in_flight[filepath]:
+                    del self._writes_in_flight[filepath]
+        
+        for (filepath, value), ok in zip(items, results):
+            self.on_write_finished(ok, filepath, value)
+    
+    def _has_unfinished_write(self, filepath):
+        """Check whether a write to filepath is queued or still in progress"""
+        return filepath in self._pending_writes or filepath in self._writes_in_flight
+    
+    async def _write_with_pkexec(self, items):
+        """Write all values with a single pkexec call for GUI authentication"""
+        targets = ", ".join(filepath for filepath, _ in items)
+        try:
+            # Use pkexec with a shell to write every value at once
             # This will prompt for authentication via GUI if needed
-            cmd = ['pkexec', 'tee', filepath]
-            result = subprocess.run(cmd, input=value, text=True, 
-                                  capture_output=True, timeout=30)
+            script = " && ".join(f"echo {shlex.quote(value)} > {shlex.quote(filepath)}"
+                                 for filepath, value in items)
+            proc = await asyncio.create_subprocess_exec(
+                'pkexec', 'sh', '-c', script,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            try:
+                _, stderr = await asyncio.wait_for(proc.communicate(), timeout=30)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                print(f"Timeout writing to {targets}")
+                return False
             
-            if result.returncode == 0:
-                print(f"Successfully wrote {value} to {filepath}")
+            if proc.returncode == 0:
+                print(f"Successfully wrote to {targets}")
                 return True
             else:
-                print(f"Failed to write to {filepath}: {result.stderr}")
+                print(f"Failed to write to {targets}: {stderr.decode()}")
                 return False
-        except subprocess.TimeoutExpired:
-            print(f"Timeout writing to {filepath}")
-            return False
         except Exception as e:
-            print(f"Exception writing to {filepath}: {e}")
+            print(f"Exception writing to {targets}: {e}")
             return False
     
-    def read_initial_status(self):
-        """Read initial status from all files"""
-        # Conservation mode
-        conservation_val = self.read_file_value(self.conservation_file)
-        if conservation_val is not None:
-            self.conservation_status = SettingStatus.CONSERVATION_ENABLED if conservation_val == "1" else SettingStatus.CONSERVATION_DISABLED
-        
-        # FnLock
-        fnlock_val = self.read_file_value(self.fnlock_file)
-        if fnlock_val is not None:
-            self.fnlock_status = SettingStatus.FNLOCK_ENABLED if fnlock_val == "1" else SettingStatus.FNLOCK_DISABLED
-        
-        # Keyboard LEDs
-        kbd_led_val = self.read_file_value(self.kbd_led_file)
-        if kbd_led_val is not None:
+    def on_write_finished(self, ok, filepath, value):
+        """Notify about a finished write, or revert the optimistic status on failure"""
+        if not ok:
+            # Several toggles may have been batched into this write, so
+            # restore the status from the file rather than inferring it.
+            # A newer write to the same file keeps its optimistic status.
+            if not self._has_unfinished_write(filepath):
+                self.read_initial_status((filepath,))
+            return
+        
+        if filepath == self.conservation_file:
+            self.show_notification("Conservation Mode", 
+                                 "Enabled" if value == "1" else "Disabled")
+        elif filepath == self.fnlock_file:
+            self.show_notification("FnLock", 
+                                 "Enabled" if value == "1" else "Disabled")
+        elif filepath == self.kbd_led_file:
+            self.show_notification("Keyboard LEDs", KBD_LED_LEVELS[int(value)])
+    
+    def _read_all(self, filepaths):
+        """Read the raw conservation, FnLock and keyboard LED values in one pass.
+        
+        Files not in filepaths are skipped and read as None.
+        """
+        # Always read: sysfs does not update st_mtime when the kernel changes
+        # a value (e.g. FnLock toggled with Fn+Esc), so an fstat based skip
+        # would miss changes. read_initial_status compares the values instead.
+        lseek, read = os.lseek, os.read
+        values = []
+        for filepath in self._status_files:
+            if filepath not in filepaths:
+                values.append(None)
+                continue
+            fd = self._fds.get(filepath)
+            if fd is None:
+                values.append(self.read_file_value(filepath))
+                continue
             try:
-                led_level = int(kbd_led_val)
-                if led_level == 0:
-                    self.kbd_led_status = SettingStatus.KBD_LED_OFF
-                elif led_level == 1:
-                    self.kbd_led_status = SettingStatus.KBD_LED_MIN
-                else:  # 2 or higher
-                    self.kbd_led_status = SettingStatus.KBD_LED_MAX
-            except ValueError:
-                self.kbd_led_status = SettingStatus.KBD_LED_OFF
-        
-        self.update_menu_text()
+                lseek(fd, 0, os.SEEK_SET)
+                values.append(read(fd, 4))
+            except OSError as e:
+                # The node is gone (e.g. the driver was reloaded) and keeps
+                # signalling POLLPRI, stop watching it and use the slow path
+                print(f"Error reading {filepath}: {e}")
+                self._drop_fd(filepath)
+                values.append(self.read_file_value(filepath))
+        return values
+    
+    def _drop_fd(self, filepath):
+        """Stop watching a cached system file and close its descriptor"""
+        notifier = self._notifiers.pop(filepath, None)
+        if notifier is not None:
+            notifier.setEnabled(False)
+            notifier.deleteLater()
+        fd = self._fds.pop(filepath, None)
+        if fd is not None:
+            os.close(fd)
+    
+    def read_initial_status(self, filepaths=None):
+        """Read status from the given files.
+        
+        By default every file without a queued or in progress write is read,
+        so a refresh does not undo the optimistic status of a pending toggle.
+        """
+        if filepaths is None:
+            filepaths = [filepath for filepath in self._status_files
+                         if not self._has_unfinished_write(filepath)]
+        previous = (self.conservation_on, self.fnlock_on, self.kbd_led_level)
+        conservation_val, fnlock_val, kbd_led_val = self._read_all(filepaths)
+        
+        # The values are a single ASCII digit followed by a newline, so
+        # inspect the first byte instead of decoding and parsing them
+        if conservation_val:
+            self.conservation_on = conservation_val[0] == 0x31
+        
+        if fnlock_val:
+            self.fnlock_on = fnlock_val[0] == 0x31
+        
+        if kbd_led_val:
+            digit = kbd_led_val[0] - 0x30
+            # 2 or higher is Max, anything that is not a digit is Off
+            self.kbd_led_level = min(digit, 2) if 0 <= digit <= 9 else 0
+        
+        # Only touch the Qt widgets when something actually changed
+        if previous[0] != self.conservation_on:
+            self.update_conservation_action()
+        if previous[1] != self.fnlock_on:
+            self.update_fnlock_action()
+        if previous[2] != self.kbd_led_level:
+            self.update_kbd_led_action()
+        if previous != (self.conservation_on, self.fnlock_on, self.kbd_led_level):
+            self.update_tooltip()
     
     def update_status(self):
         """Update status by reading from files"""
         self.read_initial_status()
-        self.update_tooltip()
+    
+    def on_kbd_led_hw_changed(self):
+        """Handle a keyboard LED brightness change made by the hardware"""
+        # sysfs keeps signalling POLLPRI until the notified file is read again
+        fd = self._fds.get(self.kbd_led_hw_file)
+        if fd is None:
+            return
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.read(fd, 4)
+        except OSError as e:
+            # ENODATA only means no hardware change was recorded yet
+            if e.errno != errno.ENODATA:
+                print(f"Error reading {self.kbd_led_hw_file}: {e}")
+                self._drop_fd(self.kbd_led_hw_file)
+        self.read_initial_status()
     
     def update_menu_text(self):
         """Update the menu action text based on current status"""
-        # Conservation mode
-        conservation_text = "Enabled" if self.conservation_status == SettingStatus.CONSERVATION_ENABLED else "Disabled"
-        conservation_enabled = self.conservation_status == SettingStatus.CONSERVATION_ENABLED
+        self.update_conservation_action()
+        self.update_fnlock_action()
+        self.update_kbd_led_action()
+    
+    def update_conservation_action(self):
+        """Update the conservation mode action text and icon"""
+        conservation_text = "Enabled" if self.conservation_on else "Disabled"
         self.conservation_action.setText(f"Conservation Mode: {conservation_text}")
-        self.conservation_action.setIcon(self.create_conservation_icon(conservation_enabled))
-        
-        # FnLock
-        fnlock_text = "Enabled" if self.fnlock_status == SettingStatus.FNLOCK_ENABLED else "Disabled"
-        fnlock_enabled = self.fnlock_status == SettingStatus.FNLOCK_ENABLED
+        self.conservation_action.setIcon(self._icon_cons[self.conservation_on])
+    
+    def update_fnlock_action(self):
+        """Update the FnLock action text and icon"""
+        fnlock_text = "Enabled" if self.fnlock_on else "Disabled"
         self.fnlock_action.setText(f"FnLock: {fnlock_text}")
-        self.fnlock_action.setIcon(self.create_fnlock_icon(fnlock_enabled))
-        
-        # Keyboard LEDs
-        if self.kbd_led_status == SettingStatus.KBD_LED_OFF:
-            kbd_text = "Off"
-            kbd_level = 0
-        elif self.kbd_led_status == SettingStatus.KBD_LED_MIN:
-            kbd_text = "Min"
-            kbd_level = 1
-        else:
-            kbd_text = "Max"
-            kbd_level = 2
-        self.kbd_led_action.setText(f"Keyboard LEDs: {kbd_text}")
-        self.kbd_led_action.setIcon(self.create_keyboard_led_icon(kbd_level))
+        self.fnlock_action.setIcon(self._icon_fnlock[self.fnlock_on])
+    
+    def update_kbd_led_action(self):
+        """Update the keyboard LED action text and icon"""
+        self.kbd_led_action.setText(f"Keyboard LEDs: {KBD_LED_LEVELS[self.kbd_led_level]}")
+        self.kbd_led_action.setIcon(self._icon_kbd_led[self.kbd_led_level])
     
     def update_tooltip(self):
         """Update the tray icon tooltip"""
-        conservation_text = "On" if self.conservation_status == SettingStatus.CONSERVATION_ENABLED else "Off"
-        fnlock_text = "On" if self.fnlock_status == SettingStatus.FNLOCK_ENABLED else "Off"
-        
-        if self.kbd_led_status == SettingStatus.KBD_LED_OFF:
-            kbd_text = "Off"
-        elif self.kbd_led_status == SettingStatus.KBD_LED_MIN:
-            kbd_text = "Min"
-        else:
-            kbd_text = "Max"
+        key = (self.conservation_on, self.fnlock_on, self.kbd_led_level)
+        tooltip = self._tooltip_cache.get(key)
+        if tooltip is None:
+            tooltip = self._tooltip_cache[key] = self._build_tooltip(*key)
+        
+        if tooltip != self._last_tooltip:
+            self.tray_icon.setToolTip(tooltip)
+            self._last_tooltip = tooltip
+    
+    def _build_tooltip(self, conservation_on, fnlock_on, kbd_led_level):
+        """Build the tooltip text for a status combination"""
+        conservation_text = "On" if conservation_on else "Off"
+        fnlock_text = "On" if fnlock_on else "Off"
+        kbd_text = KBD_LED_LEVELS[kbd_led_level]
         
-        tooltip = f"Lenovo Control\nConservation: {conservation_text}\nFnLock: {fnlock_text}\nKBD LEDs: {kbd_text}"
-        self.tray_icon.setToolTip(tooltip)
+        return f"Lenovo Control\nConservation: {conservation_text}\nFnLock: {fnlock_text}\nKBD LEDs: {kbd_text}"
     
     def toggle_conservation_mode(self):
         """Toggle conservation mode between enabled and disabled"""
-        if self.conservation_status == SettingStatus.CONSERVATION_ENABLED:
-            new_value = "0"
-            self.conservation_status = SettingStatus.CONSERVATION_DISABLED
-        else:
-            new_value = "1"
-            self.conservation_status = SettingStatus.CONSERVATION_ENABLED
-        
-        if self.write_file_value(self.conservation_file, new_value):
-            self.update_menu_text()
-            self.update_tooltip()
-            self.show_notification("Conservation Mode", 
-                                 "Enabled" if new_value == "1" else "Disabled")
-        else:
-            # Revert status on failure
-            self.conservation_status = SettingStatus.CONSERVATION_DISABLED if new_value == "1" else SettingStatus.CONSERVATION_ENABLED
+        self.conservation_on = not self.conservation_on
+        new_value = "1" if self.conservation_on else "0"
+        
+        # Update optimistically, on_write_finished reverts on failure
+        self.update_conservation_action()
+        self.update_tooltip()
+        self.write_file_value(self.conservation_file, new_value)
     
     def toggle_fnlock(self):
         """Toggle FnLock between enabled and disabled"""
-        if self.fnlock_status == SettingStatus.FNLOCK_ENABLED:
-            new_value = "0"
-            self.fnlock_status = SettingStatus.FNLOCK_DISABLED
-        else:
-            new_value = "1"
-            self.fnlock_status = SettingStatus.FNLOCK_ENABLED
-        
-        if self.write_file_value(self.fnlock_file, new_value):
-            self.update_menu_text()
-            self.update_tooltip()
-            self.show_notification("FnLock", 
-                                 "Enabled" if new_value == "1" else "Disabled")
-        else:
-            # Revert status on failure
-            self.fnlock_status = SettingStatus.FNLOCK_DISABLED if new_value == "1" else SettingStatus.FNLOCK_ENABLED
+        self.fnlock_on = not self.fnlock_on
+        new_value = "1" if self.fnlock_on else "0"
+        
+        # Update optimistically, on_write_finished reverts on failure
+        self.update_fnlock_action()
+        self.update_tooltip()
+        self.write_file_value(self.fnlock_file, new_value)
     
     def cycle_kbd_leds(self):
         """Cycle keyboard LEDs through Off -> Min -> Max -> Off"""
-        if self.kbd_led_status == SettingStatus.KBD_LED_OFF:
-            new_value = "1"
-            self.kbd_led_status = SettingStatus.KBD_LED_MIN
-            status_text = "Min"
-        elif self.kbd_led_status == SettingStatus.KBD_LED_MIN:
-            new_value = "2"
-            self.kbd_led_status = SettingStatus.KBD_LED_MAX
-            status_text = "Max"
-        else:  # KBD_LED_MAX
-            new_value = "0"
-            self.kbd_led_status = SettingStatus.KBD_LED_OFF
-            status_text = "Off"
-        
-        if self.write_file_value(self.kbd_led_file, new_value):
-            self.update_menu_text()
-            self.update_tooltip()
-            self.show_notification("Keyboard LEDs", status_text)
-        else:
-            # Revert status on failure
-            if new_value == "1":
-                self.kbd_led_status = SettingStatus.KBD_LED_OFF
-            elif new_value == "2":
-                self.kbd_led_status = SettingStatus.KBD_LED_MIN
-            else:
-                self.kbd_led_status = SettingStatus.KBD_LED_MAX
+        self.kbd_led_level = (self.kbd_led_level + 1) % 3
+        new_value = str(self.kbd_led_level)
+        
+        # Update optimistically, on_write_finished reverts on failure
+        self.update_kbd_led_action()
+        self.update_tooltip()
+        self.write_file_value(self.kbd_led_file, new_value)
     
     def show_notification(self, title, message):
         """Show system tray notification"""
-        if self.tray_icon.supportsMessages():
+        if self._supports_msgs:
             self.tray_icon.showMessage(title, message, QSystemTrayIcon.Information, 2000)
     
-    def exit_application(self):
+    @qasync.asyncSlot()
+    async def exit_application(self):
         """Exit the application"""
-        # Clean up timers
+        # Stop watching the system files
         self.status_timer.stop()
+        for notifier in self._notifiers.values():
+            notifier.setEnabled(False)
+        self._notifiers.clear()
         self.tray_icon.hide()
+        
+        # Send writes still waiting for the debounce timer and let them finish
+        self._flush_timer.stop()
+        self._flush_writes()
+        if self._write_tasks:
+            await asyncio.gather(*self._write_tasks, return_exceptions=True)
+        
+        # Close cached file descriptors
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+        self.helper.close()
         QApplication.quit()
-    
-    def authenticate_sudo(self):
-        """This method is no longer needed with pkexec approach"""
-        return True
-    
-    def refresh_sudo_credentials(self):
-        """This method is no longer needed with pkexec approach"""
-        pass
-    
-    def check_sudo_validity(self):
-        """This method is no longer needed with pkexec approach"""
-        return True
 
 
 def main():
@@ -493,11 +545,19 @@ def main():
     # Don't quit when the last window is closed
     app.setQuitOnLastWindowClosed(False)
     
+    # Run asyncio tasks (writes) on the Qt event loop
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    
     # Create and show the tray application
     tray_app = LenovoTrayApp()
     
+    # Finish the setup once the event loop is running
+    loop.call_soon(tray_app._finish_init)
+    
     # Start the application
-    sys.exit(app.exec_())
+    with loop:
+        loop.run_forever()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Lenovo Legion Tray Helper
+A small privileged helper for the tray application. It is started by
+systemd socket activation, keeps the system files open and writes the
+values requested by the tray application.
+
+Protocol: the client sends 2 byte messages (setting id, value) and gets a
+1 byte reply for each of them, 1 on success and 0 on failure.
+
+Only root and members of ALLOWED_GROUP may connect. The socket permissions
+enforce the same group, the peer credentials are checked here as well.
+"""
+
+import os
+import sys
+import grp
+import pwd
+import socket
+import struct
+import selectors
+
+
+BASE_FOLDER = "/sys/devices/pci0000:00/0000:00:14.3/PNP0C09:00/VPC2004:00/"
+
+# Setting id -> (system file, accepted values)
+SETTINGS = {
+    0: ("conservation_mode", (0, 1)),
+    1: ("fn_lock", (0, 1)),
+    2: ("leds/platform::kbd_backlight/brightness", (0, 1, 2)),
+}
+
+# First file descriptor passed by systemd socket activation
+SD_LISTEN_FDS_START = 3
+
+# Group whose members may change the settings
+ALLOWED_GROUP = "wheel"
+
+# Unsent replies after which a client that does not read them is dropped
+MAX_PENDING_REPLIES = 1024
+
+ACK_OK = b"\x01"
+ACK_FAILED = b"\x00"
+
+
+def open_settings():
+    """Open every system file once, returns a setting id -> fd mapping"""
+    fds = {}
+    for setting_id, (name, _) in SETTINGS.items():
+        filepath = os.path.join(BASE_FOLDER, name)
+        try:
+            fds[setting_id] = os.open(filepath, os.O_RDWR)
+        except OSError as e:
+            print(f"Error opening {filepath}: {e}", file=sys.stderr)
+    return fds
+
+
+def get_listen_socket():
+    """Return the listening socket passed by systemd"""
+    if os.environ.get("LISTEN_PID") != str(os.getpid()) or os.environ.get("LISTEN_FDS") != "1":
+        print("lenovo-tray-helper must be started through lenovo-tray-helper.socket", file=sys.stderr)
+        sys.exit(1)
+    return socket.socket(fileno=SD_LISTEN_FDS_START)
+
+
+def get_peer_creds(conn):
+    """Return the (uid, gid) of the process on the other end of the socket"""
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _, uid, gid = struct.unpack("3i", creds)
+    return uid, gid
+
+
+def is_allowed(uid, gid):
+    """Check whether the peer is root or a member of ALLOWED_GROUP"""
+    if uid == 0:
+        return True
+    try:
+        allowed_gid = grp.getgrnam(ALLOWED_GROUP).gr_gid
+        user = pwd.getpwuid(uid)
+    except KeyError:
+        return False
+    return gid == allowed_gid or allowed_gid in os.getgrouplist(user.pw_name, user.pw_gid)
+
+
+def write_setting(fds, setting_id, value):
+    """Write value to the system file of setting_id"""
+    if setting_id not in fds or value not in SETTINGS[setting_id][1]:
+        print(f"Rejected write of {value} to setting {setting_id}", file=sys.stderr)
+        return False
+    try:
+        os.pwrite(fds[setting_id], str(value).encode(), 0)
+        return True
+    except OSError as e:
+        print(f"Error writing {value} to setting {setting_id}: {e}", file=sys.stderr)
+        return False
+
+
+def main():
+    """Main function"""
+    fds = open_settings()
+    listener = get_listen_socket()
+    listener.setblocking(False)
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    # Connection -> [unparsed request bytes, unsent replies]
+    clients = {}
+
+    def drop(conn):
+        selector.unregister(conn)
+        del clients[conn]
+        conn.close()
+
+    while True:
+        for key, events in selector.select():
+            sock = key.fileobj
+            if sock is listener:
+                try:
+                    conn, _ = listener.accept()
+                except BlockingIOError:
+                    continue
+                uid, gid = get_peer_creds(conn)
+                if not is_allowed(uid, gid):
+                    print(f"Rejected client (uid {uid})", file=sys.stderr)
+                    conn.close()
+                    continue
+                print(f"Client connected (uid {uid})", file=sys.stderr)
+                # Never block the loop on a single client
+                conn.setblocking(False)
+                selector.register(conn, selectors.EVENT_READ)
+                clients[conn] = [b"", b""]
+                continue
+
+            state = clients[sock]
+
+            if events & selectors.EVENT_READ:
+                try:
+                    data = sock.recv(64)
+                except BlockingIOError:
+                    data = None
+                except OSError:
+                    data = b""
+                if data == b"":
+                    drop(sock)
+                    continue
+                if data:
+                    buf = state[0] + data
+                    while len(buf) >= 2:
+                        setting_id, value = struct.unpack("BB", buf[:2])
+                        buf = buf[2:]
+                        state[1] += ACK_OK if write_setting(fds, setting_id, value) else ACK_FAILED
+                    state[0] = buf
+
+            if state[1]:
+                try:
+                    sent = sock.send(state[1])
+                    state[1] = state[1][sent:]
+                except BlockingIOError:
+                    pass
+                except OSError:
+                    drop(sock)
+                    continue
+
+            if len(state[1]) > MAX_PENDING_REPLIES:
+                print("Dropped client that does not read its replies", file=sys.stderr)
+                drop(sock)
+                continue
+
+            # Wait for the socket to drain before sending the remaining replies
+            wanted = selectors.EVENT_READ | (selectors.EVENT_WRITE if state[1] else 0)
+            if key.events != wanted:
+                selector.modify(sock, wanted)
+
+
+if __name__ == '__main__':
+    main()